@@ -13,21 +13,19 @@ import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
+from matplotlib import font_manager
+from matplotlib.cm import ScalarMappable
 from matplotlib.gridspec import GridSpec
 import os
-import io
+import shutil
+import subprocess
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
 
-# Try to import imageio for GIF creation
-try:
-    import imageio.v2 as imageio
-    HAS_IMAGEIO = True
-except ImportError:
-    try:
-        import imageio
-        HAS_IMAGEIO = True
-    except ImportError:
-        HAS_IMAGEIO = False
-        print("Warning: imageio not available, GIFs will not be created")
+# Use gifsicle to shrink written GIFs when it is on the PATH
+GIFSICLE = shutil.which('gifsicle')
 
 # Output directory
 os.makedirs("analysis/figures/spatial", exist_ok=True)
@@ -42,37 +40,91 @@ SCENARIO_LABELS = {
     "fire_both": "Fire + Both"
 }
 
+# GIF frame layout (pixels)
+GIF_PANEL_SIZE = 360
+GIF_TITLE_HEIGHT = 50
+GIF_COLORBAR_WIDTH = 70
+GIF_MARGIN = 10
+
+# Only the columns the spatial plots read, as compact dtypes (float32 halves memory
+# traffic for the per-step scans and pivots; values only feed colormaps)
+DATA_COLUMNS = {
+    'step': 'int16',
+    'position.x': 'float32',
+    'position.y': 'float32',
+    'numAlive': 'float32',
+    'invasiveCover': 'float32',
+    'fireSeverity': 'float32',
+}
+
+@lru_cache(maxsize=None)
 def load_scenario_data(scenario):
-    """Load data for a scenario."""
+    """Load data for a scenario (cached; callers must not modify the result)."""
     filepath = f"results/{scenario}_0.csv"
     if not os.path.exists(filepath):
         print(f"Warning: {filepath} not found")
         return None
-    return pd.read_csv(filepath)
+    return pd.read_csv(filepath, usecols=list(DATA_COLUMNS), dtype=DATA_COLUMNS)
+
+def pivot_grid(step_data, metric):
+    """Pivot a single step's rows into a (y, x) grid; gaps become NaN."""
+    try:
+        return step_data.pivot(index='position.y', columns='position.x', values=metric)
+    except ValueError:
+        # Duplicate positions (e.g. several replicates in one file): place values
+        # by sorted-coordinate lookup instead, last row winning
+        x = step_data['position.x'].to_numpy()
+        y = step_data['position.y'].to_numpy()
+        x_vals, y_vals = np.unique(x), np.unique(y)
+
+        grid = np.full((len(y_vals), len(x_vals)), np.nan)
+        grid[np.searchsorted(y_vals, y), np.searchsorted(x_vals, x)] = step_data[metric].to_numpy()
+        return pd.DataFrame(grid, index=y_vals, columns=x_vals)
 
 def create_grid(df, step, metric):
     """Create a 2D grid from dataframe for a given step and metric."""
-    step_data = df[df['step'] == step].copy()
-
-    # Get grid dimensions
-    x_vals = sorted(step_data['position.x'].unique())
-    y_vals = sorted(step_data['position.y'].unique())
-
-    # Create grid
-    grid = np.full((len(y_vals), len(x_vals)), np.nan)
-
-    for _, row in step_data.iterrows():
-        xi = x_vals.index(row['position.x'])
-        yi = y_vals.index(row['position.y'])
-        grid[yi, xi] = row[metric]
+    grid = pivot_grid(df[df['step'] == step], metric)
+
+    return grid.to_numpy(dtype=np.float32), grid.columns.to_numpy(), grid.index.to_numpy()
+
+def create_step_grids(df, metric):
+    """Create 2D grids for every step in one pass, keyed by step."""
+    # Align every step to the scenario's full extent so all grids share one shape;
+    # cells missing from a step become NaN
+    x_vals = np.sort(df['position.x'].unique())
+    y_vals = np.sort(df['position.y'].unique())
+
+    return {
+        step: pivot_grid(step_data, metric)
+            .reindex(index=y_vals, columns=x_vals)
+            .to_numpy(dtype=np.float32)
+        for step, step_data in df.groupby('step', sort=True)
+    }
+
+@lru_cache(maxsize=None)
+def load_step_grids(scenario, metric):
+    """
+    Load per-step grids for a scenario and metric (cached).
+
+    Grids are shared between the static figures and GIFs, so they are marked
+    read-only; scale with e.g. grid * 100 rather than in place.
+    """
+    df = load_scenario_data(scenario)
+    if df is None:
+        return None
 
-    return grid, x_vals, y_vals
+    step_grids = create_step_grids(df, metric)
+    for grid in step_grids.values():
+        grid.flags.writeable = False
+    return step_grids
 
 def plot_final_state_comparison():
     """Create a figure comparing final state across all scenarios."""
 
-    fig = plt.figure(figsize=(20, 8))
-    gs = GridSpec(2, 5, figure=fig, hspace=0.3, wspace=0.1)
+    # Constrained layout sizes everything in one pass, so no bbox_inches='tight' re-layout
+    fig = plt.figure(figsize=(20, 8), layout='constrained')
+    gs = GridSpec(2, 5, figure=fig)
+    top_axes, bottom_axes = [], []
 
     for i, scenario in enumerate(SCENARIOS):
         df = load_scenario_data(scenario)
@@ -83,7 +135,8 @@ def plot_final_state_comparison():
 
         # Tree population (top row)
         ax1 = fig.add_subplot(gs[0, i])
-        grid, x_vals, y_vals = create_grid(df, max_step, 'numAlive')
+        top_axes.append(ax1)
+        grid = load_step_grids(scenario, 'numAlive')[max_step]
         im1 = ax1.imshow(grid, cmap='YlGn', vmin=0, vmax=10, origin='lower')
         ax1.set_title(SCENARIO_LABELS[scenario], fontsize=10, fontweight='bold')
         if i == 0:
@@ -93,7 +146,8 @@ def plot_final_state_comparison():
 
         # Invasive cover (bottom row)
         ax2 = fig.add_subplot(gs[1, i])
-        grid, x_vals, y_vals = create_grid(df, max_step, 'invasiveCover')
+        bottom_axes.append(ax2)
+        grid = load_step_grids(scenario, 'invasiveCover')[max_step]
         im2 = ax2.imshow(grid * 100, cmap='YlOrRd', vmin=0, vmax=100, origin='lower')
         if i == 0:
             ax2.set_ylabel('Invasive Cover (%)', fontsize=11)
@@ -101,18 +155,14 @@ def plot_final_state_comparison():
         ax2.set_yticks([])
 
     # Add colorbars
-    cbar_ax1 = fig.add_axes([0.92, 0.55, 0.01, 0.35])
-    fig.colorbar(im1, cax=cbar_ax1, label='Trees')
-
-    cbar_ax2 = fig.add_axes([0.92, 0.1, 0.01, 0.35])
-    fig.colorbar(im2, cax=cbar_ax2, label='Cover (%)')
+    fig.colorbar(im1, ax=top_axes, label='Trees', shrink=0.8)
+    fig.colorbar(im2, ax=bottom_axes, label='Cover (%)', shrink=0.8)
 
     fig.suptitle('Final State (Year 50): Spatial Distribution Across Scenarios',
-                 fontsize=14, fontweight='bold', y=0.98)
+                 fontsize=14, fontweight='bold')
 
-    plt.savefig('analysis/figures/spatial/final_state_comparison.png',
-                dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig('analysis/figures/spatial/final_state_comparison.png', dpi=100)
+    plt.close(fig)
     print("Saved: final_state_comparison.png")
 
 def plot_fire_severity_map():
@@ -122,7 +172,7 @@ def plot_fire_severity_map():
     if df is None:
         return
 
-    fig, ax = plt.subplots(figsize=(8, 8))
+    fig, ax = plt.subplots(figsize=(8, 8), layout='constrained')
     grid, x_vals, y_vals = create_grid(df, 0, 'fireSeverity')
 
     im = ax.imshow(grid, cmap='hot_r', vmin=0, vmax=1, origin='lower')
@@ -133,22 +183,102 @@ def plot_fire_severity_map():
     cbar = plt.colorbar(im, ax=ax, shrink=0.8)
     cbar.set_label('Fire Severity (0-1)')
 
-    plt.savefig('analysis/figures/spatial/fire_severity_spatial.png',
-                dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig('analysis/figures/spatial/fire_severity_spatial.png', dpi=100)
+    plt.close(fig)
     print("Saved: fire_severity_spatial.png")
 
+def build_gif_palette(cmap, n_colors=224):
+    """
+    Build one fixed GIF palette for a colormap.
+
+    Samples n_colors from the colormap and fills the rest of the 256 slots
+    with a gray ramp for text, axes and background.
+    """
+    cmap_rgb = plt.get_cmap(cmap)(np.linspace(0, 1, n_colors))[:, :3]
+    gray = np.repeat(np.linspace(0, 1, 256 - n_colors)[:, None], 3, axis=1)
+    colors = (np.vstack([cmap_rgb, gray]) * 255).round().astype(np.uint8)
+
+    palette = Image.new('P', (1, 1))
+    palette.putpalette(colors.tobytes())
+    return palette
+
+def save_gif(frames, gif_path, palette, fps=5):
+    """Quantize RGB frames to a shared palette and write them as a looping GIF."""
+    images = [
+        Image.fromarray(frame).quantize(palette=palette, dither=Image.Dither.NONE)
+        for frame in frames
+    ]
+    images[0].save(gif_path, save_all=True, append_images=images[1:],
+                   duration=1000 // fps, loop=0, optimize=False)
+
+    # Optimize inter-frame differences in place (lossless; palette is already fixed)
+    if GIFSICLE:
+        subprocess.run([GIFSICLE, '-O3', '--batch', gif_path], check=False)
+
+@lru_cache(maxsize=None)
+def load_gif_font(size, bold=False):
+    """Load Matplotlib's default font for drawing text on GIF frames."""
+    props = font_manager.FontProperties(weight='bold' if bold else 'normal')
+    return ImageFont.truetype(font_manager.findfont(props), size)
+
+def make_mappable(cmap, vmin, vmax):
+    """Create the colormap/normalization used for GIF frames; NaN cells render white."""
+    cmap = plt.get_cmap(cmap).with_extremes(bad='white')
+    return ScalarMappable(norm=mcolors.Normalize(vmin=vmin, vmax=vmax), cmap=cmap)
+
+def render_heatmap(grid, mappable, panel_size=GIF_PANEL_SIZE):
+    """Colormap a grid into an RGBA array, upscaled so each cell is a solid block."""
+    rgba = mappable.to_rgba(np.flipud(grid), bytes=True)  # flip to match origin='lower'
+    cell = max(1, panel_size // max(grid.shape))
+    return np.repeat(np.repeat(rgba, cell, axis=0), cell, axis=1)
+
+def render_colorbar(mappable, height, label):
+    """Render a vertical colorbar with min/mid/max ticks and a rotated label."""
+    bar = Image.new('RGB', (GIF_COLORBAR_WIDTH, height), 'white')
+    draw = ImageDraw.Draw(bar)
+    font = load_gif_font(11)
+
+    # Gradient runs from vmax at the top to vmin at the bottom
+    norm = mappable.norm
+    bar_top, bar_bottom = GIF_MARGIN, height - GIF_MARGIN
+    values = np.linspace(norm.vmax, norm.vmin, bar_bottom - bar_top)
+    gradient = mappable.to_rgba(np.tile(values[:, None], (1, 14)), bytes=True)[:, :, :3]
+    bar.paste(Image.fromarray(gradient), (0, bar_top))
+    draw.rectangle([0, bar_top, 13, bar_bottom - 1], outline='black')
+
+    for value in (norm.vmin, (norm.vmin + norm.vmax) / 2, norm.vmax):
+        y = bar_bottom - (value - norm.vmin) / (norm.vmax - norm.vmin) * (bar_bottom - bar_top)
+        draw.line([14, y, 17, y], fill='black')
+        draw.text((20, y), f'{value:g}', fill='black', font=font, anchor='lm')
+
+    # Label reads bottom-to-top along the right edge
+    text_img = Image.new('RGB', (height, 20), 'white')
+    ImageDraw.Draw(text_img).text((height // 2, 10), label, fill='black', font=font,
+                                  anchor='mm')
+    bar.paste(text_img.rotate(90, expand=True), (GIF_COLORBAR_WIDTH - 22, 0))
+    return bar
+
+def compose_row(panels, gutter=GIF_MARGIN):
+    """Concatenate equally sized RGB panels left to right with white gutters."""
+    spacer = np.full((panels[0].shape[0], gutter, 3), 255, dtype=np.uint8)
+    pieces = [spacer]
+    for panel in panels:
+        pieces.extend([panel, spacer])
+    return np.concatenate(pieces, axis=1)
+
+def draw_centered_text(draw, width, y, text, size, bold=True):
+    """Draw one or more lines of text centered horizontally at height y."""
+    font = load_gif_font(size, bold)
+    draw.multiline_text((width // 2, y), text, fill='black', font=font, anchor='ma',
+                        align='center')
+
 def create_scenario_gif(scenario, metric='numAlive', fps=5):
     """Create an animated GIF for a single scenario."""
 
-    if not HAS_IMAGEIO:
+    step_grids = load_step_grids(scenario, metric)
+    if step_grids is None:
         return
 
-    df = load_scenario_data(scenario)
-    if df is None:
-        return
-
-    steps = sorted(df['step'].unique())
     frames = []
 
     # Set up colormap and limits based on metric
@@ -156,58 +286,51 @@ def create_scenario_gif(scenario, metric='numAlive', fps=5):
         cmap = 'YlGn'
         vmin, vmax = 0, 10
         label = 'Trees per Patch'
+        scale = 1
     else:  # invasiveCover
         cmap = 'YlOrRd'
         vmin, vmax = 0, 100
         label = 'Invasive Cover (%)'
-
-    for step in steps:
-        fig, ax = plt.subplots(figsize=(6, 6))
-
-        grid, x_vals, y_vals = create_grid(df, step, metric)
-        if metric == 'invasiveCover':
-            grid = grid * 100  # Convert to percentage
-
-        im = ax.imshow(grid, cmap=cmap, vmin=vmin, vmax=vmax, origin='lower')
-        ax.set_title(f'{SCENARIO_LABELS[scenario]}\nYear {step}', fontsize=12, fontweight='bold')
-        ax.set_xticks([])
-        ax.set_yticks([])
-
-        cbar = plt.colorbar(im, ax=ax, shrink=0.8)
-        cbar.set_label(label)
-
-        # Save frame to buffer
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        buf.seek(0)
-        frame = imageio.imread(buf)
-        frames.append(frame)
-        buf.close()
-        plt.close()
+        scale = 100  # Convert to percentage
+
+    # Colormap grids directly into pixels; Matplotlib is only used for the colormap
+    mappable = make_mappable(cmap, vmin, vmax)
+    first_panel = render_heatmap(next(iter(step_grids.values())), mappable)
+    panel_h, panel_w = first_panel.shape[:2]
+    colorbar = render_colorbar(mappable, panel_h, label)
+    width = GIF_MARGIN + panel_w + GIF_MARGIN + GIF_COLORBAR_WIDTH
+    height = GIF_TITLE_HEIGHT + panel_h + GIF_MARGIN
+
+    for step, grid in step_grids.items():
+        frame = Image.new('RGB', (width, height), 'white')
+        frame.paste(Image.fromarray(render_heatmap(grid * scale, mappable)).convert('RGB'),
+                    (GIF_MARGIN, GIF_TITLE_HEIGHT))
+        frame.paste(colorbar, (GIF_MARGIN + panel_w + GIF_MARGIN, GIF_TITLE_HEIGHT))
+        draw_centered_text(ImageDraw.Draw(frame), width, 6,
+                           f'{SCENARIO_LABELS[scenario]}\nYear {step}', 14)
+        frames.append(np.asarray(frame))
 
     # Save GIF
     metric_name = 'trees' if metric == 'numAlive' else 'invasive'
     gif_path = f'analysis/figures/spatial/{scenario}_{metric_name}.gif'
-    imageio.mimsave(gif_path, frames, fps=fps, loop=0)
+    save_gif(frames, gif_path, build_gif_palette(cmap), fps=fps)
     print(f"Saved: {scenario}_{metric_name}.gif")
 
 def create_combined_gif(metric='numAlive', fps=5):
     """Create a combined GIF showing all scenarios side by side."""
 
-    if not HAS_IMAGEIO:
+    loaded = [scenario for scenario in SCENARIOS if load_scenario_data(scenario) is not None]
+    if not loaded:
         return
 
-    # Load all scenario data
-    all_data = {}
-    for scenario in SCENARIOS:
-        df = load_scenario_data(scenario)
-        if df is not None:
-            all_data[scenario] = df
-
-    if not all_data:
-        return
+    # Split each scenario into per-step grids once, keyed by (scenario, step)
+    all_grids = {}
+    for scenario in loaded:
+        for step, grid in load_step_grids(scenario, metric).items():
+            all_grids[(scenario, step)] = grid
 
-    steps = sorted(list(all_data.values())[0]['step'].unique())
+    # Cover every step any scenario reached; shorter runs show a blank panel
+    steps = sorted({step for _, step in all_grids})
     frames = []
 
     # Set up colormap and limits
@@ -216,71 +339,85 @@ def create_combined_gif(metric='numAlive', fps=5):
         vmin, vmax = 0, 10
         label = 'Trees per Patch'
         title_metric = 'Tree Population'
+        scale = 1
     else:
         cmap = 'YlOrRd'
         vmin, vmax = 0, 100
         label = 'Invasive Cover (%)'
         title_metric = 'Invasive Cover'
+        scale = 100
+
+    # Tile per-scenario bitmaps side by side under a shared title
+    mappable = make_mappable(cmap, vmin, vmax)
+    first_panel = render_heatmap(next(iter(all_grids.values())), mappable, GIF_PANEL_SIZE // 2)
+    panel_h, panel_w = first_panel.shape[:2]
+    blank_panel = np.full((panel_h, panel_w, 3), 255, dtype=np.uint8)
+    panel_top = GIF_TITLE_HEIGHT + 20  # room for the scenario labels
+    row_width = GIF_MARGIN + len(SCENARIOS) * (panel_w + GIF_MARGIN)
+    width = row_width + GIF_COLORBAR_WIDTH
+    height = panel_top + panel_h + GIF_MARGIN
+
+    # Scenario labels and colorbar never change, so draw them once into a template
+    template = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(template)
+    for i, scenario in enumerate(SCENARIOS):
+        if scenario in loaded:
+            x = GIF_MARGIN + i * (panel_w + GIF_MARGIN)
+            draw.text((x + panel_w // 2, panel_top - 4), SCENARIO_LABELS[scenario],
+                      fill='black', font=load_gif_font(11, bold=True), anchor='mb')
+    template.paste(render_colorbar(mappable, panel_h, label), (row_width, panel_top))
+    template = np.asarray(template)
 
     for step in steps:
-        fig, axes = plt.subplots(1, 5, figsize=(18, 4))
-
-        for i, scenario in enumerate(SCENARIOS):
-            if scenario not in all_data:
-                continue
-
-            df = all_data[scenario]
-            grid, x_vals, y_vals = create_grid(df, step, metric)
-            if metric == 'invasiveCover':
-                grid = grid * 100
-
-            im = axes[i].imshow(grid, cmap=cmap, vmin=vmin, vmax=vmax, origin='lower')
-            axes[i].set_title(SCENARIO_LABELS[scenario], fontsize=9, fontweight='bold')
-            axes[i].set_xticks([])
-            axes[i].set_yticks([])
-
-        # Add colorbar
-        cbar_ax = fig.add_axes([0.92, 0.15, 0.01, 0.7])
-        fig.colorbar(im, cax=cbar_ax, label=label)
-
-        fig.suptitle(f'{title_metric} Evolution - Year {step}',
-                    fontsize=12, fontweight='bold')
-
-        # Save frame to buffer
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        buf.seek(0)
-        frame = imageio.imread(buf)
-        frames.append(frame)
-        buf.close()
-        plt.close()
+        panels = []
+        for scenario in SCENARIOS:
+            grid = all_grids.get((scenario, step))
+            if grid is None:
+                panels.append(blank_panel)
+            else:
+                panels.append(render_heatmap(grid * scale, mappable, GIF_PANEL_SIZE // 2)[:, :, :3])
+        frame = template.copy()
+        frame[panel_top:panel_top + panel_h, :row_width] = compose_row(panels)
+
+        image = Image.fromarray(frame)
+        draw_centered_text(ImageDraw.Draw(image), width, 10,
+                           f'{title_metric} Evolution - Year {step}', 14)
+        frames.append(np.asarray(image))
 
     # Save GIF
     metric_name = 'trees' if metric == 'numAlive' else 'invasive'
     gif_path = f'analysis/figures/spatial/all_scenarios_{metric_name}.gif'
-    imageio.mimsave(gif_path, frames, fps=fps, loop=0)
+    save_gif(frames, gif_path, build_gif_palette(cmap), fps=fps)
     print(f"Saved: all_scenarios_{metric_name}.gif")
 
 def main():
     print("Generating spatial visualizations...")
     print("=" * 50)
 
-    # Static comparisons
-    plot_final_state_comparison()
-    plot_fire_severity_map()
-
-    # Animated GIFs
-    if HAS_IMAGEIO:
-        print("\nGenerating animated GIFs (this may take a moment)...")
+    # Every figure and GIF is independent, so render them across processes
+    tasks = [
+        # Static comparisons
+        (plot_final_state_comparison, ()),
+        (plot_fire_severity_map, ()),
 
         # Combined GIFs for all scenarios
-        create_combined_gif(metric='numAlive', fps=5)
-        create_combined_gif(metric='invasiveCover', fps=5)
-
-        # Individual scenario GIFs (just for key scenarios)
-        for scenario in ['fire_only', 'fire_removal']:
-            create_scenario_gif(scenario, metric='numAlive', fps=5)
-            create_scenario_gif(scenario, metric='invasiveCover', fps=5)
+        (create_combined_gif, ('numAlive', 5)),
+        (create_combined_gif, ('invasiveCover', 5)),
+    ]
+
+    # Individual scenario GIFs (just for key scenarios)
+    for scenario in ['fire_only', 'fire_removal']:
+        tasks.append((create_scenario_gif, (scenario, 'numAlive', 5)))
+        tasks.append((create_scenario_gif, (scenario, 'invasiveCover', 5)))
+
+    print("\nGenerating figures and animated GIFs (this may take a moment)...")
+
+    # Spawn rather than fork: Matplotlib state is not fork-safe on macOS
+    with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1),
+                             mp_context=mp.get_context('spawn')) as executor:
+        futures = [executor.submit(fn, *args) for fn, args in tasks]
+        for future in futures:
+            future.result()  # Re-raise any worker errors
 
     print("\n" + "=" * 50)
     print("All spatial visualizations saved to analysis/figures/spatial/")
@@ -20,37 +20,40 @@ Usage (as module):
     clean_generated_configs()
 """
 
-import csv
 import os
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+import pandas as pd
+
 # Module-level defaults
 SCRIPT_DIR = Path(__file__).parent
 DEFAULT_CSV = SCRIPT_DIR / "sweep_definitions.csv"
 CONFIG_FILENAME = "params.jshc"
+WRITE_WORKERS = 16
 
 def parse_csv(csv_path: Path) -> list:
     """Parse CSV and return list of config dictionaries."""
-    configs = []
-    with open(csv_path, newline='') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            configs.append(dict(row))
-    return configs
+    # Keep every cell as a string; empty cells stay '' rather than NaN
+    try:
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return []
+    return df.to_dict('records')
 
 def extract_parameters(row: dict) -> tuple:
     """
-    Extract path and parameters from a CSV row.
+    Extract path and parameters from a CSV row (the row is not modified).
     Returns: (path, [(param_name, value, unit), ...])
     """
-    path = row.pop('path')
+    path = row['path']
 
     # Group parameters with their units
     params = []
-    param_names = [k for k in row.keys() if not k.endswith('_unit')]
+    param_names = [k for k in row.keys() if k != 'path' and not k.endswith('_unit')]
 
     for name in param_names:
         value = row[name]
@@ -91,6 +94,28 @@ def write_config(base_dir: Path, path: str, content: str) -> Path:
 
     return config_path
 
+def write_configs(base_dir: Path, configs: list) -> list:
+    """
+    Write config files for every CSV row in one batch.
+    Each directory is created once, then files are written concurrently.
+    Returns: list of config paths, in CSV order
+    """
+    config_paths = []
+    contents = {}  # Duplicate paths keep the last row, as sequential writes did
+    for row in configs:
+        path, params = extract_parameters(row)
+        config_path = base_dir / path / CONFIG_FILENAME
+        config_paths.append(config_path)
+        contents[config_path] = generate_jshc(params, path)
+
+    for config_dir in {config_path.parent for config_path in contents}:
+        config_dir.mkdir(parents=True, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        list(executor.map(lambda pair: pair[0].write_text(pair[1]), contents.items()))
+
+    return config_paths
+
 def clean_generated(base_dir: Path, csv_path: Path):
     """Remove all directories that were generated from the CSV."""
     if not csv_path.exists():
@@ -139,13 +164,9 @@ def generate_sweep_configs(csv_path=None, output_dir=None, verbose=True):
     if verbose:
         print(f"Generating {len(configs)} configurations from {csv_path.name}")
 
-    generated_paths = []
-    for row in configs:
-        path, params = extract_parameters(row.copy())
-        content = generate_jshc(params, path)
-        config_path = write_config(output_dir, path, content)
-        generated_paths.append(config_path)
-        if verbose:
+    generated_paths = write_configs(output_dir, configs)
+    if verbose:
+        for config_path in generated_paths:
             print(f"  Created: {config_path.relative_to(output_dir)}")
 
     if verbose:
@@ -187,10 +208,7 @@ def main():
     configs = parse_csv(csv_path)
     print(f"Generating {len(configs)} configurations from {csv_path.name}")
 
-    for row in configs:
-        path, params = extract_parameters(row.copy())
-        content = generate_jshc(params, path)
-        config_path = write_config(SCRIPT_DIR, path, content)
+    for config_path in write_configs(SCRIPT_DIR, configs):
         print(f"  Created: {config_path.relative_to(SCRIPT_DIR)}")
 
     print(f"\nDone. Generated {len(configs)} config files.")